@@ -3,19 +3,93 @@ import sqlite3
 import pandas as pd
 from datetime import datetime, date
 import random
+import threading
+from contextlib import contextmanager
+
+# --- SQL STATEMENTS ---
+
+# Kept as constants so every call reuses the connection's prepared statement cache
+SQL_INSERT_TASK = ''' INSERT INTO tasks(title, description, priority, due_date, status)
+                      VALUES(?,?,?,?,?) '''
+
+SQL_EXPORT_TASKS = ''' SELECT id AS "ID", title AS "Title", description AS "Description",
+                              priority AS "Priority", due_date AS "Due Date", status AS "Status",
+                              created_at AS "Created At"
+                       FROM tasks
+                       ORDER BY due_date ASC'''
+
+# Only the active filters go into the WHERE clause, so SQLite can pick an index for them
+SQL_SELECT_TASKS = "SELECT * FROM tasks"
+
+SQL_SEARCH_PREDICATE = "(py_lower(title) LIKE :q ESCAPE '\\' OR py_lower(description) LIKE :q ESCAPE '\\')"
+
+SQL_ORDER_BY_DUE_DATE = "ORDER BY due_date ASC"
+
+SQL_COUNT_TASKS_BY_STATUS = "SELECT status, COUNT(*) FROM tasks GROUP BY status"
+
+SQL_UPDATE_TASK_STATUS = ''' UPDATE tasks
+                             SET status = ?
+                             WHERE id = ?'''
+
+SQL_UPDATE_TASK_DETAILS = ''' UPDATE tasks
+                              SET title = ?,
+                                  description = ?,
+                                  priority = ?,
+                                  due_date = ?
+                              WHERE id = ?'''
+
+SQL_DELETE_TASK = 'DELETE FROM tasks WHERE id=?'
 
 # --- DATABASE SETUP ---
 
-# Function to create a connection to the SQLite database
-def create_connection():
-    """Create a database connection to a SQLite database."""
-    conn = None
-    try:
-        conn = sqlite3.connect("tasks.db")  # Creates the file if it doesn't exist
-    except sqlite3.Error as e:
-        st.error(f"Database connection error: {e}")
+# Bind dates as ISO strings and read DATE/TIMESTAMP columns back as date/datetime objects
+sqlite3.register_adapter(date, lambda d: d.isoformat())
+sqlite3.register_converter("DATE", lambda b: date.fromisoformat(b.decode()))
+sqlite3.register_converter("TIMESTAMP", lambda b: datetime.fromisoformat(b.decode()))
+
+def py_lower(value):
+    """Lowercase with Python's Unicode rules; SQLite's LOWER() only folds ASCII."""
+    return value.lower() if value is not None else None
+
+# Shared connection to the SQLite database, reused across reruns and sessions
+@st.cache_resource
+def get_conn():
+    """Create the long-lived database connection and make sure the table exists."""
+    conn = sqlite3.connect("tasks.db", check_same_thread=False, cached_statements=128,
+                           detect_types=sqlite3.PARSE_DECLTYPES)  # Creates the file if it doesn't exist
+    # WAL lets readers run alongside a writer, and NORMAL sync skips the fsync on every commit
+    for pragma in ("journal_mode=WAL", "synchronous=NORMAL", "temp_store=MEMORY",
+                   "mmap_size=268435456", "cache_size=-20000"):
+        conn.execute(f"PRAGMA {pragma}")
+    conn.create_function("py_lower", 1, py_lower, deterministic=True)
+    create_table(conn)
     return conn
 
+# Lock serializing writes on the shared connection
+@st.cache_resource
+def get_db_lock():
+    """Return the lock guarding mutating queries on the shared connection."""
+    return threading.Lock()
+
+# Counter bumped by every mutation, shared by all sessions like the database itself
+@st.cache_resource
+def get_tasks_version():
+    """Return the mutable counter used as the cache key for task queries."""
+    return {"value": 0}
+
+def bump_tasks_version():
+    """Invalidate cached task queries after a write."""
+    get_tasks_version()["value"] += 1
+
+# All writes of one user action share a single transaction and a single commit
+@contextmanager
+def transaction(conn):
+    """Hold the write lock and commit everything done in the block at once."""
+    with get_db_lock():
+        with conn:  # Commits on success, rolls back on error
+            yield conn
+        bump_tasks_version()
+
 # Function to create the tasks table if it doesn't exist
 def create_table(conn):
     """Create a tasks table."""
@@ -32,6 +106,11 @@ def create_table(conn):
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
+        # Indexes the planner picks for the due date sort, the status filter and status + priority
+        c.execute("CREATE INDEX IF NOT EXISTS idx_tasks_due ON tasks(due_date)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status_due ON tasks(status, due_date)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status_priority ON tasks(status, priority, due_date)")
+        c.execute("ANALYZE")  # Refresh planner statistics so the indexes get picked
         conn.commit()
     except sqlite3.Error as e:
         st.error(f"Table creation error: {e}")
@@ -40,80 +119,208 @@ def create_table(conn):
 
 def add_task(conn, title, description, priority, due_date):
     """Add a new task to the database."""
-    sql = ''' INSERT INTO tasks(title, description, priority, due_date, status)
-              VALUES(?,?,?,?,?) '''
-    cur = conn.cursor()
-    cur.execute(sql, (title, description, priority, due_date, "Pending"))
-    conn.commit()
+    cur = conn.execute(SQL_INSERT_TASK, (title, description, priority, due_date, "Pending"))
     return cur.lastrowid
 
-def view_all_tasks(conn):
-    """Query all rows in the tasks table."""
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM tasks ORDER BY due_date ASC")
-    rows = cur.fetchall()
-    return rows
-
-def update_task_status(conn, task_id, status):
-    """Update a task's status."""
-    sql = ''' UPDATE tasks
-              SET status = ?
-              WHERE id = ?'''
-    cur = conn.cursor()
-    cur.execute(sql, (status, task_id))
-    conn.commit()
+def bulk_add_tasks(conn, tasks):
+    """Add several (title, description, priority, due_date) tasks with one prepared statement."""
+    conn.executemany(SQL_INSERT_TASK, [(*task, "Pending") for task in tasks])
+
+def filtered_tasks(conn, q, priority, status):
+    """Load the tasks matching the search keyword, priority and status filters into a DataFrame."""
+    predicates, params = [], {}
+    if q:
+        # Escape LIKE wildcards so the keyword is matched literally
+        q = q.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        predicates.append(SQL_SEARCH_PREDICATE)
+        params["q"] = f"%{q}%"
+    if priority != "All":
+        predicates.append("priority = :p")
+        params["p"] = priority
+    if status != "All":
+        predicates.append("status = :s")
+        params["s"] = status
+
+    sql = SQL_SELECT_TASKS
+    if predicates:
+        sql += " WHERE " + " AND ".join(predicates)
+    sql += " " + SQL_ORDER_BY_DUE_DATE
+    return pd.read_sql_query(sql, conn, params=params)
+
+# Old versions are never hit again, so the caches keyed on them are bounded
+@st.cache_data(show_spinner=False, max_entries=32)
+def load_filtered_tasks(version, q, priority, status):
+    """Return the filtered tasks, re-querying only when the version or filters change."""
+    return filtered_tasks(get_conn(), q, priority, status)
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def export_csv(version):
+    """Return every task as CSV bytes, rebuilt only when the tasks version changes."""
+    df = pd.read_sql_query(SQL_EXPORT_TASKS, get_conn())
+    return df.to_csv(index=False).encode('utf-8')
+
+def get_status_counts(conn):
+    """Count the tasks in each status."""
+    return dict(conn.execute(SQL_COUNT_TASKS_BY_STATUS).fetchall())
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def load_status_counts(version):
+    """Return the per-status task counts, re-querying only when the tasks version changes."""
+    return get_status_counts(get_conn())
+
+def bulk_update_status(conn, task_ids, status):
+    """Set the status of several tasks with one prepared statement."""
+    conn.executemany(SQL_UPDATE_TASK_STATUS, [(status, task_id) for task_id in task_ids])
 
 def update_task_details(conn, task_id, title, description, priority, due_date):
     """Update all details of a specific task."""
-    sql = ''' UPDATE tasks
-              SET title = ?,
-                  description = ?,
-                  priority = ?,
-                  due_date = ?
-              WHERE id = ?'''
-    cur = conn.cursor()
-    cur.execute(sql, (title, description, priority, due_date, task_id))
-    conn.commit()
+    conn.execute(SQL_UPDATE_TASK_DETAILS, (title, description, priority, due_date, task_id))
 
 
 def delete_task(conn, task_id):
     """Delete a task by task id."""
-    sql = 'DELETE FROM tasks WHERE id=?'
-    cur = conn.cursor()
-    cur.execute(sql, (task_id,))
-    conn.commit()
+    conn.execute(SQL_DELETE_TASK, (task_id,))
 
 # --- HELPER FUNCTIONS ---
 
+QUOTES = (
+    "The secret of getting ahead is getting started. - Mark Twain",
+    "The best way to predict the future is to create it. - Peter Drucker",
+    "Don't watch the clock; do what it does. Keep going. - Sam Levenson",
+    "The only limit to our realization of tomorrow is our doubts of today. - Franklin D. Roosevelt",
+    "Well done is better than well said. - Benjamin Franklin",
+    "It does not matter how slowly you go as long as you do not stop. - Confucius"
+)
+
+@st.cache_data(ttl=3600, show_spinner=False)
 def get_motivational_quote():
-    """Returns a random motivational quote."""
-    quotes = [
-        "The secret of getting ahead is getting started. - Mark Twain",
-        "The best way to predict the future is to create it. - Peter Drucker",
-        "Don't watch the clock; do what it does. Keep going. - Sam Levenson",
-        "The only limit to our realization of tomorrow is our doubts of today. - Franklin D. Roosevelt",
-        "Well done is better than well said. - Benjamin Franklin",
-        "It does not matter how slowly you go as long as you do not stop. - Confucius"
-    ]
-    return random.choice(quotes)
+    """Returns a random motivational quote, picked again once an hour."""
+    return random.choice(QUOTES)
 
 # --- UI LAYOUT ---
 
+# Icons shown next to each priority level
+PRIORITY_MAP = {"High": "🔴", "Medium": "🟡", "Low": "🟢"}
+
+# Column setup shared by the pending and completed task tables
+TASK_COLUMN_CONFIG = {
+    "done": st.column_config.CheckboxColumn("Done", width="small"),
+    "icon": st.column_config.TextColumn("", width="small", disabled=True),
+    "title": st.column_config.TextColumn("Title", max_chars=100, required=True),
+    "description": st.column_config.TextColumn("Description"),
+    "priority": st.column_config.SelectboxColumn("Priority", options=list(PRIORITY_MAP), required=True),
+    "due_date": st.column_config.DateColumn("Due Date", format="MMM DD, YYYY", required=True),
+    "overdue": st.column_config.CheckboxColumn("Overdue", width="small", disabled=True),
+    "delete": st.column_config.CheckboxColumn("🗑️ Delete", width="small"),
+}
+
+def to_date(value):
+    """Convert a date cell from the data editor (a date or an ISO string) to a date."""
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+def apply_task_edits(conn, tasks_df, changes):
+    """Write the data editor's row edits, additions and deletions to the database.
+
+    Returns True if anything was written.
+    """
+    detail_updates, completed_ids, reopened_ids, deleted_ids, new_tasks = [], [], [], [], []
+    for row, edits in changes["edited_rows"].items():
+        task = tasks_df.iloc[int(row)].to_dict()
+        if "done" in edits and edits["done"] != task["done"]:
+            (completed_ids if edits["done"] else reopened_ids).append(int(task["id"]))
+        if edits.get("delete"):
+            deleted_ids.append(int(task["id"]))
+        details = {k: v for k, v in edits.items() if k in ("title", "description", "priority", "due_date")}
+        task.update(details)
+        if details and task["title"] and task["priority"] and task["due_date"]:
+            detail_updates.append((int(task["id"]), task["title"], task["description"],
+                                   task["priority"], to_date(task["due_date"])))
+
+    for row in changes["deleted_rows"]:
+        deleted_ids.append(int(tasks_df.iloc[int(row)]["id"]))
+
+    # Rows still missing a title are skipped; they only survive while no save or
+    # full rerun changes the editor's key (see render_task_editor)
+    for task in changes["added_rows"]:
+        if task.get("title"):
+            due_date = to_date(task["due_date"]) if task.get("due_date") else date.today()
+            new_tasks.append((task["title"], task.get("description") or "",
+                              task.get("priority") or "Medium", due_date))
+
+    if not (detail_updates or completed_ids or reopened_ids or deleted_ids or new_tasks):
+        return False
+
+    with transaction(conn):
+        for params in detail_updates:
+            update_task_details(conn, *params)
+        bulk_update_status(conn, completed_ids, "Completed")
+        bulk_update_status(conn, reopened_ids, "Pending")
+        for task_id in deleted_ids:
+            delete_task(conn, task_id)
+        bulk_add_tasks(conn, new_tasks)
+    return True
+
+def render_task_editor(tasks, tasks_version, conn, name, column_order, disabled=(), num_rows="dynamic"):
+    """Render tasks as one editable table and save whatever the user changes in it."""
+    df = tasks.reset_index(drop=True)
+    df.insert(0, "done", df["status"].eq("Completed"))
+    df["icon"] = df["priority"].map(PRIORITY_MAP)
+    df["overdue"] = df["due_date"] < date.today()
+    df["delete"] = False
+
+    # One widget key per table, not per task. It is keyed on the version the rows were
+    # loaded at (not the live counter, which other sessions can bump between fragment
+    # reruns), so fragment reruns keep the user's pending edits. Any save, or a full
+    # rerun after another session wrote, starts a fresh editor and discards unsaved
+    # input such as a half-filled new row
+    editor_key = f"{name}_editor_{tasks_version}"
+    st.data_editor(
+        df,
+        key=editor_key,
+        num_rows=num_rows,
+        hide_index=True,
+        use_container_width=True,
+        column_order=column_order,
+        column_config=TASK_COLUMN_CONFIG,
+        disabled=disabled,
+    )
+    if apply_task_edits(conn, df, st.session_state[editor_key]):
+        st.rerun()
+
+# Only this block reruns when its own widgets change; mutations still rerun the whole app
+@st.fragment
+def render_pending(pending_tasks, tasks_version, conn):
+    """Render the pending tasks as one editable table."""
+    if pending_tasks.empty:
+        st.info("🎉 No pending tasks! You're all caught up.")
+        return
+
+    render_task_editor(pending_tasks, tasks_version, conn, "pending",
+                       ("done", "icon", "title", "description", "priority", "due_date", "overdue"))
+
+@st.fragment
+def render_completed(completed_tasks, tasks_version, conn):
+    """Render the completed tasks; untick a task to reopen it."""
+    if completed_tasks.empty:
+        st.write("No tasks completed yet.")
+    else:
+        render_task_editor(completed_tasks, tasks_version, conn, "completed",
+                           ("done", "icon", "title", "priority", "due_date", "delete"),
+                           disabled=("title", "description", "priority", "due_date"),
+                           num_rows="fixed")
+
 def main():
     st.set_page_config(page_title="ProducTODO ✔️", layout="wide", page_icon="✔️")
 
-    # Initialize connection and create table
-    conn = create_connection()
-    if conn is not None:
-        create_table(conn)
-    else:
-        st.error("Error! cannot create the database connection.")
+    # Get the shared connection (the table is created on first use)
+    try:
+        conn = get_conn()
+    except sqlite3.Error as e:
+        st.error(f"Error! cannot create the database connection: {e}")
         return
 
-    # Initialize session state for editing
-    if 'task_to_edit' not in st.session_state:
-        st.session_state.task_to_edit = None
-
     # --- HEADER ---
     st.title("ProducTODO ✔️")
     st.markdown(f"> *{get_motivational_quote()}*")
@@ -136,21 +343,25 @@ def main():
             
             submitted = st.form_submit_button("Add Task")
             if submitted and new_title:
-                add_task(conn, new_title, new_desc, new_priority, new_due_date)
+                with transaction(conn):
+                    add_task(conn, new_title, new_desc, new_priority, new_due_date)
                 st.sidebar.success("Task added successfully!")
                 st.rerun()
 
     # Filters and Search
-    search_query = st.sidebar.text_input("🔍 Search Tasks", placeholder="Search by keyword...")
+    # The search box only reruns on Enter or blur; normalizing the keyword lets
+    # queries differing only in case or surrounding spaces share one cache entry
+    search_query = st.sidebar.text_input("🔍 Search Tasks", placeholder="Search by keyword...").strip().lower()
     filter_priority = st.sidebar.selectbox("Filter by Priority", ["All", "High", "Medium", "Low"])
     filter_status = st.sidebar.selectbox("Filter by Status", ["All", "Pending", "Completed"])
 
-    all_tasks = view_all_tasks(conn)
+    tasks_version = get_tasks_version()["value"]
 
     # --- DASHBOARD / SUMMARY ---
-    pending_tasks_count = sum(1 for task in all_tasks if task[5] == "Pending")
-    completed_tasks_count = len(all_tasks) - pending_tasks_count
-    total_tasks = len(all_tasks)
+    status_counts = load_status_counts(tasks_version)
+    pending_tasks_count = status_counts.get("Pending", 0)
+    total_tasks = sum(status_counts.values())
+    completed_tasks_count = total_tasks - pending_tasks_count
 
     st.header("Productivity Dashboard")
     col1, col2, col3, col4 = st.columns(4)
@@ -169,114 +380,34 @@ def main():
 
     # --- TASK DISPLAY ---
 
-    # Apply filters
-    tasks_to_display = all_tasks
-    if search_query:
-        tasks_to_display = [t for t in tasks_to_display if search_query.lower() in t[1].lower() or search_query.lower() in t[2].lower()]
-    if filter_priority != "All":
-        tasks_to_display = [t for t in tasks_to_display if t[3] == filter_priority]
-    if filter_status != "All":
-        tasks_to_display = [t for t in tasks_to_display if t[5] == filter_status]
+    # Apply filters in the database; completed tasks are only fetched while they are shown,
+    # which filtering by Completed implies without touching the toggle's own value
+    show_completed = filter_status == "Completed" or st.session_state.get("show_completed", False)
+    query_status = "Pending" if not show_completed and filter_status == "All" else filter_status
+    tasks_to_display = load_filtered_tasks(tasks_version, search_query, filter_priority, query_status)
+
+    # Split pending and completed tasks with a single status comparison
+    is_pending = tasks_to_display["status"].eq("Pending")
 
     # Display pending tasks
     st.header("Pending Tasks")
-    pending_tasks = [task for task in tasks_to_display if task[5] == "Pending"]
-    
-    if not pending_tasks:
-        st.info("🎉 No pending tasks! You're all caught up.")
-    else:
-        for task in pending_tasks:
-            task_id, title, description, priority, due_date_str, status, _ = task
-            due_date = datetime.strptime(due_date_str, '%Y-%m-%d').date()
-            is_overdue = due_date < date.today()
+    render_pending(tasks_to_display[is_pending], tasks_version, conn)
 
-            priority_map = {"High": "🔴", "Medium": "🟡", "Low": "🟢"}
-            
-            task_container = st.container(border=True)
-            with task_container:
-                # Edit Form inside the container for a specific task
-                if st.session_state.task_to_edit == task_id:
-                    with st.form(f"edit_form_{task_id}"):
-                        st.subheader(f"Editing Task: '{title}'")
-                        edit_title = st.text_input("Title", value=title)
-                        edit_desc = st.text_area("Description", value=description)
-                        edit_priority = st.selectbox("Priority", ["High", "Medium", "Low"], index=["High", "Medium", "Low"].index(priority))
-                        edit_due_date = st.date_input("Due Date", value=due_date)
-                        
-                        c1, c2 = st.columns(2)
-                        if c1.form_submit_button("Save Changes", use_container_width=True):
-                            update_task_details(conn, task_id, edit_title, edit_desc, edit_priority, edit_due_date)
-                            st.session_state.task_to_edit = None
-                            st.rerun()
-                        if c2.form_submit_button("Cancel", use_container_width=True):
-                            st.session_state.task_to_edit = None
-                            st.rerun()
-
-                else:
-                    cols = st.columns([1, 6, 2, 2, 2])
-                    
-                    # Column 1: Checkbox for completion
-                    is_completed = cols[0].checkbox("", key=f"check_{task_id}")
-                    if is_completed:
-                        update_task_status(conn, task_id, "Completed")
-                        st.rerun()
-
-                    # Column 2: Title and Description
-                    with cols[1]:
-                        st.markdown(f"**{title}**")
-                        if description:
-                            with st.expander("Details"):
-                                st.write(description)
-
-                    # Column 3: Priority
-                    cols[2].markdown(f"{priority_map.get(priority, '')} {priority}")
-                    
-                    # Column 4: Due Date
-                    date_color = "red" if is_overdue else "gray"
-                    cols[3].markdown(f"<span style='color:{date_color};'>🗓️ {due_date.strftime('%b %d, %Y')}</span>", unsafe_allow_html=True)
-                    
-                    # Column 5: Edit and Delete buttons
-                    with cols[4]:
-                        if st.button("✏️ Edit", key=f"edit_{task_id}", use_container_width=True):
-                            st.session_state.task_to_edit = task_id
-                            st.rerun()
-                        if st.button("🗑️ Delete", key=f"del_{task_id}", use_container_width=True):
-                            delete_task(conn, task_id)
-                            st.rerun()
-    
-    # Display completed tasks in an expander
+    # Display completed tasks on demand
     st.markdown("---")
-    with st.expander("✅ Completed Tasks"):
-        completed_tasks = [task for task in tasks_to_display if task[5] == "Completed"]
-        if not completed_tasks:
-            st.write("No tasks completed yet.")
-        else:
-            for task in completed_tasks:
-                task_id, title, _, _, _, _, _ = task
-                cols = st.columns([1, 8, 2])
-                # Un-complete checkbox
-                uncomplete = cols[0].checkbox("", value=True, key=f"uncheck_{task_id}")
-                if not uncomplete:
-                    update_task_status(conn, task_id, "Pending")
-                    st.rerun()
-
-                cols[1].markdown(f"~~_{title}_~~")
-                if cols[2].button("🗑️ Delete", key=f"del_comp_{task_id}", use_container_width=True):
-                    delete_task(conn, task_id)
-                    st.rerun()
+    # Kept rendered (only disabled) so Streamlit doesn't discard its stored value
+    st.toggle("✅ Show Completed Tasks", key="show_completed", disabled=filter_status == "Completed")
+    if show_completed:
+        render_completed(tasks_to_display[~is_pending], tasks_version, conn)
 
     # --- EXPORT DATA ---
     if total_tasks > 0:
-        df = pd.DataFrame(all_tasks, columns=['ID', 'Title', 'Description', 'Priority', 'Due Date', 'Status', 'Created At'])
-        csv = df.to_csv(index=False).encode('utf-8')
         st.sidebar.download_button(
             label="📥 Export Tasks to CSV",
-            data=csv,
+            data=export_csv(tasks_version),
             file_name='my_tasks.csv',
             mime='text/csv',
         )
 
-    conn.close()
-
 if __name__ == '__main__':
     main()
\ No newline at end of file